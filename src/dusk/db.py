@@ -1,9 +1,15 @@
 from __future__ import annotations
 
+import atexit
+import json
 import os
 import sqlite3
+import threading
+import zlib
+from collections.abc import Iterable
 from datetime import datetime
-from pathlib import Path
+from itertools import groupby
+from operator import itemgetter
 
 from .models import (
     DirEntry,
@@ -13,21 +19,65 @@ from .models import (
     ScanResult,
     TrendEntry,
 )
+from .paths import DUSK_DIR
 
-DB_DIR = Path.home() / ".dusk"
+DB_DIR = DUSK_DIR
 DB_PATH = DB_DIR / "dusk.db"
 
+SCHEMA_VERSION = 4
 
-def _get_conn() -> sqlite3.Connection:
-    DB_DIR.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(str(DB_PATH))
-    conn.execute("PRAGMA journal_mode=WAL")
-    conn.execute("PRAGMA foreign_keys=ON")
-    _init_schema(conn)
-    return conn
+_SQL_INSERT_SCAN = """INSERT INTO scans
+    (timestamp, root_path, total_scanned_bytes,
+     disk_total, disk_used, disk_free, disk_available,
+     volume_name, fs_type, apfs_container, timestamp_unix,
+     entries_blob)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+_SQL_SELECT_ENTRIES = (
+    "SELECT path, size_bytes, is_dir, file_count FROM entries"
+    " WHERE scan_id = ? ORDER BY is_dir DESC, size_bytes DESC"
+)
+
+_CONN: sqlite3.Connection | None = None
+_CONN_LOCK = threading.Lock()
+
+
+def _conn() -> sqlite3.Connection:
+    """Return the process-wide connection, opening it on first use."""
+    global _CONN
+    if _CONN is None:
+        with _CONN_LOCK:
+            if _CONN is None:
+                DB_DIR.mkdir(parents=True, exist_ok=True)
+                # Autocommit mode: writers open their own BEGIN IMMEDIATE
+                conn = sqlite3.connect(
+                    str(DB_PATH),
+                    isolation_level=None,
+                    check_same_thread=False,
+                    cached_statements=256,
+                )
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA foreign_keys=ON")
+                # WAL + synchronous=NORMAL only fsyncs at checkpoints: a crash
+                # may drop the last committed scan but never corrupts the DB.
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute("PRAGMA temp_store=MEMORY")
+                conn.execute("PRAGMA cache_size=-65536")
+                try:
+                    conn.execute("PRAGMA mmap_size=268435456")
+                except sqlite3.Error:
+                    pass
+                _init_schema(conn)
+                atexit.register(conn.close)
+                _CONN = conn
+    return _CONN
 
 
 def _init_schema(conn: sqlite3.Connection) -> None:
+    """Create or migrate the schema; safe to rerun on any older version."""
+    (version,) = conn.execute("PRAGMA user_version").fetchone()
+    if version >= SCHEMA_VERSION:
+        return
     conn.executescript("""
         CREATE TABLE IF NOT EXISTS scans (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -40,7 +90,9 @@ def _init_schema(conn: sqlite3.Connection) -> None:
             disk_available INTEGER NOT NULL,
             volume_name TEXT,
             fs_type TEXT,
-            apfs_container TEXT
+            apfs_container TEXT,
+            timestamp_unix INTEGER,
+            entries_blob BLOB
         );
 
         CREATE TABLE IF NOT EXISTS entries (
@@ -54,20 +106,46 @@ def _init_schema(conn: sqlite3.Connection) -> None:
         );
 
         CREATE INDEX IF NOT EXISTS idx_entries_scan_id ON entries(scan_id);
-        CREATE INDEX IF NOT EXISTS idx_scans_root_path ON scans(root_path);
+        CREATE INDEX IF NOT EXISTS idx_scans_root_ts ON scans(root_path, timestamp DESC);
+
+        -- v1 index, superseded by the prefix of idx_scans_root_ts
+        DROP INDEX IF EXISTS idx_scans_root_path;
     """)
+    # v3: integer timestamp so reads skip ISO-string parsing
+    columns = {r[1] for r in conn.execute("PRAGMA table_info(scans)")}
+    if "timestamp_unix" not in columns:
+        conn.execute("ALTER TABLE scans ADD COLUMN timestamp_unix INTEGER")
+    # v4: entries packed into one blob per scan. Nothing writes to the
+    # entries table any more; it only holds rows of scans saved before v4
+    if "entries_blob" not in columns:
+        conn.execute("ALTER TABLE scans ADD COLUMN entries_blob BLOB")
+    conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+
+def _pack_entries(result: ScanResult) -> bytes:
+    """Serialize a scan's directories and files into one compressed blob."""
+    payload = (
+        [(d.path, d.size_bytes, d.file_count) for d in result.directories],
+        [(f.path, f.size_bytes) for f in result.large_files],
+    )
+    return zlib.compress(json.dumps(payload, separators=(",", ":")).encode())
+
+
+def _unpack_entries(blob: bytes) -> tuple[list[DirEntry], list[FileEntry]]:
+    dir_rows, file_rows = json.loads(zlib.decompress(blob))
+    return (
+        [DirEntry(path=p, size_bytes=s, file_count=c) for p, s, c in dir_rows],
+        [FileEntry(path=p, size_bytes=s) for p, s in file_rows],
+    )
 
 
 def save_scan(result: ScanResult) -> int:
     """Save a scan result and return the scan id."""
-    conn = _get_conn()
-    try:
+    conn = _conn()
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
         cur = conn.execute(
-            """INSERT INTO scans
-               (timestamp, root_path, total_scanned_bytes,
-                disk_total, disk_used, disk_free, disk_available,
-                volume_name, fs_type, apfs_container)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            _SQL_INSERT_SCAN,
             (
                 result.timestamp.isoformat(),
                 result.root_path,
@@ -79,32 +157,22 @@ def save_scan(result: ScanResult) -> int:
                 result.disk_info.volume_name,
                 result.disk_info.fs_type,
                 result.disk_info.apfs_container,
+                int(result.timestamp.timestamp()),
+                _pack_entries(result),
             ),
         )
-        scan_id = cur.lastrowid
-        assert scan_id is not None
-
-        dir_rows = [
-            (scan_id, d.path, d.size_bytes, 1, d.file_count)
-            for d in result.directories
-        ]
-        file_rows = [
-            (scan_id, f.path, f.size_bytes, 0, None)
-            for f in result.large_files
-        ]
-        conn.executemany(
-            "INSERT INTO entries (scan_id, path, size_bytes, is_dir, file_count) VALUES (?, ?, ?, ?, ?)",
-            dir_rows + file_rows,
-        )
-        conn.commit()
-        result.scan_id = scan_id
-        return scan_id
-    finally:
-        conn.close()
+    scan_id = cur.lastrowid
+    assert scan_id is not None
+    result.scan_id = scan_id
+    return scan_id
 
 
-def _row_to_scan(row: sqlite3.Row, conn: sqlite3.Connection) -> ScanResult:
-    scan_id = row[0]
+def _build_scan(row: sqlite3.Row, entry_rows: Iterable[tuple] = ()) -> ScanResult:
+    """Build a ScanResult from a scans row.
+
+    entry_rows are (path, size_bytes, is_dir, file_count) tuples, only used
+    for legacy scans that have no entries_blob.
+    """
     disk_info = DiskInfo(
         total_bytes=row[4],
         used_bytes=row[5],
@@ -115,117 +183,136 @@ def _row_to_scan(row: sqlite3.Row, conn: sqlite3.Connection) -> ScanResult:
         apfs_container=row[10] or "",
     )
 
-    dir_rows = conn.execute(
-        "SELECT path, size_bytes, file_count FROM entries WHERE scan_id = ? AND is_dir = 1 ORDER BY size_bytes DESC",
-        (scan_id,),
-    ).fetchall()
-    file_rows = conn.execute(
-        "SELECT path, size_bytes FROM entries WHERE scan_id = ? AND is_dir = 0 ORDER BY size_bytes DESC",
-        (scan_id,),
-    ).fetchall()
+    if row[12] is not None:
+        directories, large_files = _unpack_entries(row[12])
+    else:
+        directories = []
+        large_files = []
+        for path, size_bytes, is_dir, file_count in entry_rows:
+            if is_dir:
+                directories.append(DirEntry(path=path, size_bytes=size_bytes, file_count=file_count))
+            else:
+                large_files.append(FileEntry(path=path, size_bytes=size_bytes))
+
+    # Rows written before schema v3 only have the ISO string
+    if row[11] is not None:
+        timestamp = datetime.fromtimestamp(row[11])
+    else:
+        timestamp = datetime.fromisoformat(row[1])
 
     return ScanResult(
-        scan_id=scan_id,
-        timestamp=datetime.fromisoformat(row[1]),
+        scan_id=row[0],
+        timestamp=timestamp,
         root_path=row[2],
         disk_info=disk_info,
-        directories=[DirEntry(path=r[0], size_bytes=r[1], file_count=r[2]) for r in dir_rows],
-        large_files=[FileEntry(path=r[0], size_bytes=r[1]) for r in file_rows],
+        directories=directories,
+        large_files=large_files,
         total_scanned_bytes=row[3],
     )
 
 
+def _row_to_scan(row: sqlite3.Row, conn: sqlite3.Connection) -> ScanResult:
+    if row[12] is not None:
+        return _build_scan(row)
+    entry_rows = conn.execute(_SQL_SELECT_ENTRIES, (row[0],)).fetchall()
+    return _build_scan(row, entry_rows)
+
+
 def get_scan_by_id(scan_id: int) -> ScanResult | None:
-    conn = _get_conn()
-    try:
-        row = conn.execute(
-            "SELECT * FROM scans WHERE id = ?",
-            (scan_id,),
-        ).fetchone()
-        if row is None:
-            return None
-        return _row_to_scan(row, conn)
-    finally:
-        conn.close()
+    conn = _conn()
+    row = conn.execute(
+        "SELECT * FROM scans WHERE id = ?",
+        (scan_id,),
+    ).fetchone()
+    if row is None:
+        return None
+    return _row_to_scan(row, conn)
 
 
 def get_latest_scan(root_path: str) -> ScanResult | None:
-    conn = _get_conn()
-    try:
-        row = conn.execute(
-            "SELECT * FROM scans WHERE root_path = ? ORDER BY timestamp DESC LIMIT 1",
-            (root_path,),
-        ).fetchone()
-        if row is None:
-            return None
-        return _row_to_scan(row, conn)
-    finally:
-        conn.close()
+    conn = _conn()
+    row = conn.execute(
+        "SELECT * FROM scans WHERE root_path = ? ORDER BY timestamp DESC LIMIT 1",
+        (root_path,),
+    ).fetchone()
+    if row is None:
+        return None
+    return _row_to_scan(row, conn)
 
 
 def get_previous_scan(root_path: str) -> ScanResult | None:
     """Get the second-most-recent scan for a root path."""
-    conn = _get_conn()
-    try:
-        rows = conn.execute(
-            "SELECT * FROM scans WHERE root_path = ? ORDER BY timestamp DESC LIMIT 2",
-            (root_path,),
-        ).fetchall()
-        if len(rows) < 2:
-            return None
-        return _row_to_scan(rows[1], conn)
-    finally:
-        conn.close()
+    conn = _conn()
+    rows = conn.execute(
+        "SELECT * FROM scans WHERE root_path = ? ORDER BY timestamp DESC LIMIT 2",
+        (root_path,),
+    ).fetchall()
+    if len(rows) < 2:
+        return None
+    return _row_to_scan(rows[1], conn)
 
 
 def get_scan_history(root_path: str | None = None, limit: int = 20) -> list[ScanResult]:
-    conn = _get_conn()
-    try:
-        if root_path:
-            rows = conn.execute(
-                "SELECT * FROM scans WHERE root_path = ? ORDER BY timestamp DESC LIMIT ?",
-                (root_path, limit),
-            ).fetchall()
-        else:
-            rows = conn.execute(
-                "SELECT * FROM scans ORDER BY timestamp DESC LIMIT ?",
-                (limit,),
-            ).fetchall()
-        return [_row_to_scan(r, conn) for r in rows]
-    finally:
-        conn.close()
+    conn = _conn()
+    if root_path:
+        rows = conn.execute(
+            "SELECT * FROM scans WHERE root_path = ? ORDER BY timestamp DESC LIMIT ?",
+            (root_path, limit),
+        ).fetchall()
+    else:
+        rows = conn.execute(
+            "SELECT * FROM scans ORDER BY timestamp DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+    if not rows:
+        return []
+
+    # Fetch entries for all legacy scans at once instead of one query per scan
+    ids = [r[0] for r in rows if r[12] is None]
+    if not ids:
+        return [_build_scan(r) for r in rows]
+    placeholders = ",".join("?" * len(ids))
+    entry_rows = conn.execute(
+        f"SELECT scan_id, path, size_bytes, is_dir, file_count FROM entries WHERE scan_id IN ({placeholders}) ORDER BY scan_id, is_dir DESC, size_bytes DESC",
+        ids,
+    ).fetchall()
+    entries_by_scan = {
+        scan_id: [e[1:] for e in group]
+        for scan_id, group in groupby(entry_rows, key=itemgetter(0))
+    }
+    return [_build_scan(r, entries_by_scan.get(r[0], ())) for r in rows]
 
 
 def compare_scans(current: ScanResult, previous: ScanResult) -> ScanComparison:
     """Compare two scans and produce trend entries."""
-    current_dirs = {os.path.basename(d.path.rstrip("/")): d for d in current.directories}
-    previous_dirs = {os.path.basename(d.path.rstrip("/")): d for d in previous.directories}
+    basename = os.path.basename
+    # Keyed by basename, so on duplicates the last one wins
+    current_dirs = {basename(d.path.rstrip("/")): d for d in current.directories}
+    previous_dirs = {basename(d.path.rstrip("/")): d for d in previous.directories}
 
-    all_keys = set(current_dirs.keys()) | set(previous_dirs.keys())
-    trends: list[TrendEntry] = []
-    new_dirs: list[DirEntry] = []
+    # (abs delta, trend) pairs, so the sort key is computed once per trend
+    decorated: list[tuple[int, TrendEntry]] = []
     removed_dirs: list[DirEntry] = []
 
-    for key in all_keys:
-        cur = current_dirs.get(key)
-        prev = previous_dirs.get(key)
-
-        if cur and prev:
-            delta = cur.size_bytes - prev.size_bytes
-            pct = (delta / prev.size_bytes * 100) if prev.size_bytes else 0.0
-            trends.append(TrendEntry(
-                path=cur.path,
-                current_bytes=cur.size_bytes,
-                previous_bytes=prev.size_bytes,
-                delta_bytes=delta,
-                delta_percent=pct,
-            ))
-        elif cur and not prev:
-            new_dirs.append(cur)
-        elif prev and not cur:
+    # Matched entries are popped, so whatever is left in current_dirs is new
+    for name, prev in previous_dirs.items():
+        cur = current_dirs.pop(name, None)
+        if cur is None:
             removed_dirs.append(prev)
-
-    trends.sort(key=lambda t: abs(t.delta_bytes), reverse=True)
+            continue
+        delta = cur.size_bytes - prev.size_bytes
+        pct = (delta / prev.size_bytes * 100) if prev.size_bytes else 0.0
+        decorated.append((abs(delta), TrendEntry(
+            path=cur.path,
+            current_bytes=cur.size_bytes,
+            previous_bytes=prev.size_bytes,
+            delta_bytes=delta,
+            delta_percent=pct,
+        )))
+    new_dirs = list(current_dirs.values())
+
+    decorated.sort(key=itemgetter(0), reverse=True)
+    trends = [t for _, t in decorated]
     overall_delta = current.total_scanned_bytes - previous.total_scanned_bytes
 
     return ScanComparison(
@@ -240,21 +327,19 @@ def compare_scans(current: ScanResult, previous: ScanResult) -> ScanComparison:
 
 def prune_old_scans(keep: int = 10) -> int:
     """Delete old scans keeping only the most recent `keep` per root_path."""
-    conn = _get_conn()
-    try:
-        roots = conn.execute("SELECT DISTINCT root_path FROM scans").fetchall()
-        deleted = 0
-        for (root_path,) in roots:
-            ids = conn.execute(
-                "SELECT id FROM scans WHERE root_path = ? ORDER BY timestamp DESC",
-                (root_path,),
-            ).fetchall()
-            to_delete = [row[0] for row in ids[keep:]]
-            if to_delete:
-                placeholders = ",".join("?" * len(to_delete))
-                conn.execute(f"DELETE FROM scans WHERE id IN ({placeholders})", to_delete)
-                deleted += len(to_delete)
-        conn.commit()
-        return deleted
-    finally:
-        conn.close()
+    conn = _conn()
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        cur = conn.execute(
+            """DELETE FROM scans WHERE id IN (
+                   SELECT id FROM (
+                       SELECT id, ROW_NUMBER() OVER (
+                           PARTITION BY root_path ORDER BY timestamp DESC
+                       ) AS rn
+                       FROM scans
+                   )
+                   WHERE rn > ?
+               )""",
+            (keep,),
+        )
+    return cur.rowcount
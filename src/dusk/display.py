@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 import os
+from concurrent.futures import Future
 from datetime import datetime
+from functools import lru_cache
 from urllib.parse import quote
 
 from rich.console import Console
@@ -13,14 +15,27 @@ from .models import DockerReport, ScanComparison, ScanResult
 
 console = Console()
 
+# Hyperlinks are dropped on non-terminal output, so skip building them
+_IS_TTY = console.is_terminal
 
+_HOME = os.path.expanduser("~")
+_HOME_LEN = len(_HOME)
+
+# Progress bars are sliced from these instead of rebuilt per render
+_FULL_BAR = "█" * 64
+_EMPTY_BAR = "░" * 64
+
+
+_UNITS = ("B", "KB", "MB", "GB", "TB", "PB")
+
+
+@lru_cache(maxsize=4096)
 def _format_bytes(b: int) -> str:
     """Human-readable byte size."""
-    for unit in ("B", "KB", "MB", "GB", "TB"):
-        if abs(b) < 1024:
-            return f"{b:.1f} {unit}"
-        b /= 1024  # type: ignore[assignment]
-    return f"{b:.1f} PB"
+    n = -b if b < 0 else b
+    # Each unit is 2**10 of the previous, so bit_length picks it directly
+    i = min((n.bit_length() - 1) // 10, 5) if n else 0
+    return f"{b / (1 << (10 * i)):.1f} {_UNITS[i]}"
 
 
 def _format_delta(delta: int) -> str:
@@ -28,6 +43,7 @@ def _format_delta(delta: int) -> str:
     return f"{sign}{_format_bytes(delta)}"
 
 
+@lru_cache(maxsize=4096)
 def _usage_color(pct: float) -> str:
     if pct < 70:
         return "green"
@@ -36,16 +52,17 @@ def _usage_color(pct: float) -> str:
     return "red"
 
 
+@lru_cache(maxsize=4096)
 def _shorten_path(path: str, max_len: int = 50) -> str:
     """Shorten path for display, replacing home with ~."""
-    home = os.path.expanduser("~")
-    if path.startswith(home):
-        path = "~" + path[len(home):]
+    if path.startswith(_HOME):
+        path = "~" + path[_HOME_LEN:]
     if len(path) <= max_len:
         return path
     return "..." + path[-(max_len - 3):]
 
 
+@lru_cache(maxsize=4096)
 def _file_type(path: str) -> str:
     ext = os.path.splitext(path)[1].lower()
     return ext if ext else "-"
@@ -59,7 +76,7 @@ def show_disk_overview(result: ScanResult) -> None:
 
     bar_width = 40
     filled = int(bar_width * pct / 100)
-    bar = f"[{color}]{'█' * filled}[/{color}]{'░' * (bar_width - filled)}"
+    bar = f"[{color}]{_FULL_BAR[:filled]}[/{color}]{_EMPTY_BAR[:bar_width - filled]}"
 
     lines = [
         f"  Volume: {di.volume_name or 'N/A'}  ({di.fs_type or 'unknown'})",
@@ -93,21 +110,28 @@ def show_directories(result: ScanResult) -> None:
     table.add_column("Size", style="bold", justify="right", width=10)
     table.add_column("Bar", width=25)
 
+    # Bar lengths are 0..20, so only 21 distinct bar cells ever exist
+    bars = [Text.assemble((_FULL_BAR[:n], "blue")) for n in range(21)]
     for d in result.directories:
         name = _shorten_path(d.path)
         size = _format_bytes(d.size_bytes)
         bar_len = int(20 * d.size_bytes / max_size) if max_size else 0
-        bar = "█" * bar_len
-        table.add_row(name, size, f"[blue]{bar}[/blue]")
+        table.add_row(name, size, bars[bar_len])
 
     console.print(table)
 
 
+@lru_cache(maxsize=2048)
+def _folder_uri(folder: str) -> str:
+    return "file://" + quote(folder, safe="/:")
+
+
 def _dir_link(path: str) -> str:
     """Return a Rich markup string with a clickable link to the containing folder."""
-    folder = os.path.dirname(path)
-    uri = "file://" + quote(folder, safe="/:")
     display_path = _shorten_path(path, 80)
+    if not _IS_TTY:
+        return display_path
+    uri = _folder_uri(os.path.dirname(path))
     return f"[link={uri}]{display_path}[/link]"
 
 
@@ -167,24 +191,26 @@ def show_trends(comparison: ScanComparison) -> None:
             _shorten_path(t.path, 40),
             _format_bytes(t.previous_bytes),
             _format_bytes(t.current_bytes),
-            f"[{delta_style}]{_format_delta(t.delta_bytes)}[/{delta_style}]",
-            f"[{pct_style}]{t.delta_percent:+.1f}%[/{pct_style}]",
+            Text.assemble((_format_delta(t.delta_bytes), delta_style)),
+            Text.assemble((f"{t.delta_percent:+.1f}%", pct_style)),
         )
 
+    new_cell = Text.assemble(("NEW", "green"))
     for d in comparison.new_dirs:
         table.add_row(
             _shorten_path(d.path, 40),
             "-",
             _format_bytes(d.size_bytes),
-            f"[green]NEW[/green]",
+            new_cell,
             "",
         )
+    removed_cell = Text.assemble(("REMOVED", "red"))
     for d in comparison.removed_dirs:
         table.add_row(
             _shorten_path(d.path, 40),
             _format_bytes(d.size_bytes),
             "-",
-            f"[red]REMOVED[/red]",
+            removed_cell,
             "",
         )
 
@@ -223,20 +249,29 @@ def show_history(scans: list[ScanResult]) -> None:
             _shorten_path(s.root_path, 30),
             _format_bytes(s.total_scanned_bytes),
             _format_bytes(s.disk_info.used_bytes),
-            f"[{color}]{pct:.1f}%[/{color}]",
+            Text.assemble((f"{pct:.1f}%", color)),
         )
 
     console.print(table)
 
 
-def show_full_scan(result: ScanResult, comparison: ScanComparison | None = None) -> None:
-    """Show a complete scan report."""
+def show_full_scan(
+    result: ScanResult,
+    comparison: ScanComparison | Future[ScanComparison | None] | None = None,
+) -> None:
+    """Show a complete scan report.
+
+    `comparison` may be a Future still being computed; it is only waited on
+    once the trends section is reached.
+    """
     show_scan_header(result)
     show_disk_overview(result)
     console.print()
     show_directories(result)
     console.print()
     show_large_files(result)
+    if isinstance(comparison, Future):
+        comparison = comparison.result()
     if comparison:
         console.print()
         show_trends(comparison)
@@ -245,10 +280,11 @@ def show_full_scan(result: ScanResult, comparison: ScanComparison | None = None)
 
 def format_scan_text(result: ScanResult, comparison: ScanComparison | None = None) -> str:
     """Format a scan as plain text for LLM context."""
-    home = os.path.expanduser("~")
+    fb = _format_bytes
+    fd = _format_delta
 
     def tilde(p: str) -> str:
-        return "~" + p[len(home):] if p.startswith(home) else p
+        return "~" + p[_HOME_LEN:] if p.startswith(_HOME) else p
 
     di = result.disk_info
     pct = (di.used_bytes / di.total_bytes * 100) if di.total_bytes else 0
@@ -260,29 +296,25 @@ def format_scan_text(result: ScanResult, comparison: ScanComparison | None = Non
         "",
         "Top Directories:",
     ]
-    for d in result.directories:
-        lines.append(f"  {_format_bytes(d.size_bytes):>10}  {tilde(d.path)}")
+    lines.extend(f"  {fb(d.size_bytes):>10}  {tilde(d.path)}" for d in result.directories)
 
     if result.large_files:
         lines.append("")
         lines.append("Largest Files:")
-        for f in result.large_files:
-            lines.append(f"  {_format_bytes(f.size_bytes):>10}  {tilde(f.path)}")
+        lines.extend(f"  {fb(f.size_bytes):>10}  {tilde(f.path)}" for f in result.large_files)
 
     if comparison:
         meaningful = [t for t in comparison.trends if abs(t.delta_percent) > 0.1]
         if meaningful or comparison.new_dirs or comparison.removed_dirs:
             lines.append("")
-            lines.append(f"Trends (overall: {_format_delta(comparison.overall_delta)}):")
-            for t in meaningful:
-                lines.append(
-                    f"  {tilde(t.path)}: {_format_bytes(t.previous_bytes)} -> "
-                    f"{_format_bytes(t.current_bytes)} ({_format_delta(t.delta_bytes)}, {t.delta_percent:+.1f}%)"
-                )
-            for d in comparison.new_dirs:
-                lines.append(f"  {tilde(d.path)}: NEW ({_format_bytes(d.size_bytes)})")
-            for d in comparison.removed_dirs:
-                lines.append(f"  {tilde(d.path)}: REMOVED ({_format_bytes(d.size_bytes)})")
+            lines.append(f"Trends (overall: {fd(comparison.overall_delta)}):")
+            lines.extend(
+                f"  {tilde(t.path)}: {fb(t.previous_bytes)} -> "
+                f"{fb(t.current_bytes)} ({fd(t.delta_bytes)}, {t.delta_percent:+.1f}%)"
+                for t in meaningful
+            )
+            lines.extend(f"  {tilde(d.path)}: NEW ({fb(d.size_bytes)})" for d in comparison.new_dirs)
+            lines.extend(f"  {tilde(d.path)}: REMOVED ({fb(d.size_bytes)})" for d in comparison.removed_dirs)
 
     return "\n".join(lines)
 
@@ -299,7 +331,7 @@ def show_docker_overview(report: DockerReport) -> None:
 
     bar_width = 40
     filled = int(bar_width * reclaim_pct / 100)
-    bar = f"[green]{'█' * filled}[/green]{'░' * (bar_width - filled)}"
+    bar = f"[green]{_FULL_BAR[:filled]}[/green]{_EMPTY_BAR[:bar_width - filled]}"
 
     lines = [
         f"  Total Docker disk usage: [bold]{_format_bytes(total)}[/bold]",
@@ -350,7 +382,7 @@ def show_docker_images(report: DockerReport, top: int = 15) -> None:
             _format_bytes(img.size_bytes),
             _format_bytes(img.unique_bytes),
             img.created,
-            f"[{ctrs_style}]{img.containers}[/{ctrs_style}]",
+            Text.assemble((str(img.containers), ctrs_style)),
         )
 
     if len(report.images) > top:
@@ -375,16 +407,13 @@ def show_docker_containers(report: DockerReport) -> None:
     table.add_column("Created", style="dim", width=14)
 
     for ctr in report.containers:
-        if ctr.state == "running":
-            state_str = f"[green]{ctr.state}[/green]"
-        else:
-            state_str = f"[dim]{ctr.state}[/dim]"
+        state_style = "green" if ctr.state == "running" else "dim"
         table.add_row(
             ctr.name,
             ctr.image,
             ctr.container_id,
             _format_bytes(ctr.size_bytes),
-            state_str,
+            Text.assemble((ctr.state, state_style)),
             ctr.created,
         )
 
@@ -443,6 +472,7 @@ def show_docker_report(report: DockerReport) -> None:
 
 def format_docker_text(report: DockerReport) -> str:
     """Format Docker report as plain text for LLM context."""
+    fb = _format_bytes
     ov = report.overview
     total = ov.images_size + ov.containers_size + ov.volumes_size + ov.build_cache_size
     reclaimable = ov.images_reclaimable + ov.volumes_reclaimable + ov.build_cache_reclaimable
@@ -463,24 +493,23 @@ def format_docker_text(report: DockerReport) -> str:
     if report.images:
         lines.append("")
         lines.append("Top Docker Images:")
-        for img in report.images[:10]:
-            lines.append(
-                f"  {_format_bytes(img.size_bytes):>10}  {img.repo}:{img.tag}"
-                f"  (unique: {_format_bytes(img.unique_bytes)}, containers: {img.containers})"
-            )
+        lines.extend(
+            f"  {fb(img.size_bytes):>10}  {img.repo}:{img.tag}"
+            f"  (unique: {fb(img.unique_bytes)}, containers: {img.containers})"
+            for img in report.images[:10]
+        )
 
     if report.containers:
         lines.append("")
         lines.append("Docker Containers:")
-        for ctr in report.containers[:10]:
-            lines.append(
-                f"  {_format_bytes(ctr.size_bytes):>10}  {ctr.name} ({ctr.image}) [{ctr.state}]"
-            )
+        lines.extend(
+            f"  {fb(ctr.size_bytes):>10}  {ctr.name} ({ctr.image}) [{ctr.state}]"
+            for ctr in report.containers[:10]
+        )
 
     if report.volumes:
         lines.append("")
         lines.append("Docker Volumes:")
-        for vol in report.volumes[:10]:
-            lines.append(f"  {_format_bytes(vol.size_bytes):>10}  {vol.name}")
+        lines.extend(f"  {fb(vol.size_bytes):>10}  {vol.name}" for vol in report.volumes[:10])
 
     return "\n".join(lines)
@@ -1,44 +1,214 @@
 from __future__ import annotations
 
+import functools
+import hashlib
+import http.client
 import json
-import re
+import os
 import shutil
+import socket
 import subprocess
+import tempfile
+import time
+from dataclasses import asdict
+from operator import itemgetter
+from typing import Any, NamedTuple
+
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
 
 from .models import (
-    DockerBuildCache,
     DockerContainer,
     DockerImage,
     DockerOverview,
     DockerReport,
     DockerVolume,
 )
+from .paths import DUSK_DIR
+
+_DEFAULT_SOCKET = "/var/run/docker.sock"
+# Newest Engine API whose /system/df shape the parser is written against;
+# older daemons are spoken to at the version they report
+_ENGINE_API_MAX = (1, 47)
 
+# Reports are reused across back-to-back invocations (`dusk docker` then
+# `dusk ask`) for this long, as long as they came from the same daemon
+_CACHE_PATH = DUSK_DIR / "docker-cache.json"
+_CACHE_TTL = 60  # seconds
 
+
+@functools.cache
 def is_docker_available() -> bool:
     return shutil.which("docker") is not None
 
 
+# Multiplier indexed by the first byte of the unit; 0 means not a unit
+_UNIT_TABLE = [0] * 256
+_UNIT_TABLE[ord("B")] = 1
+_UNIT_TABLE[ord("k")] = 1000
+_UNIT_TABLE[ord("K")] = 1024
+_UNIT_TABLE[ord("M")] = 10**6
+_UNIT_TABLE[ord("G")] = 10**9
+_UNIT_TABLE[ord("T")] = 10**12
+_NUMBER_BYTES = frozenset(b"0123456789.")
+_SPACE_BYTES = frozenset(b" \t\n\r\x0b\x0c")
+_B = ord("B")
+
+
 def _parse_size(s: str) -> int:
     """Parse Docker size strings like '2.88GB', '178.3MB', '5.2kB' to bytes."""
-    s = s.strip()
-    if not s or s == "0B":
+    b = s.strip().encode()
+    if not b or b == b"0B":
         return 0
-    m = re.match(r"([\d.]+)\s*(B|kB|KB|MB|GB|TB)", s)
-    if not m:
+    n = len(b)
+    i = 0
+    while i < n and b[i] in _NUMBER_BYTES:
+        i += 1
+    if i == 0:
         return 0
-    val = float(m.group(1))
-    unit = m.group(2)
-    multipliers = {"B": 1, "kB": 1000, "KB": 1024, "MB": 1e6, "GB": 1e9, "TB": 1e12}
-    return int(val * multipliers.get(unit, 1))
+    j = i
+    while j < n and b[j] in _SPACE_BYTES:
+        j += 1
+    if j == n:
+        return 0
+    multiplier = _UNIT_TABLE[b[j]]
+    # Every unit other than plain "B" is two letters ending in "B"
+    if not multiplier or (b[j] != _B and (j + 1 == n or b[j + 1] != _B)):
+        return 0
+    return int(float(b[:i]) * multiplier)
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection that talks to the Docker daemon over a UNIX socket."""
+
+    def __init__(self, socket_path: str, timeout: float) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+def _docker_host() -> str:
+    """Resolve the daemon endpoint the docker CLI would use."""
+    # Same precedence as the CLI: DOCKER_HOST, DOCKER_CONTEXT, then the
+    # currentContext in config.json
+    host = os.environ.get("DOCKER_HOST", "")
+    if host:
+        return host
+    config_dir = os.environ.get("DOCKER_CONFIG") or os.path.expanduser("~/.docker")
+    context = os.environ.get("DOCKER_CONTEXT", "")
+    if not context:
+        try:
+            with open(os.path.join(config_dir, "config.json"), "rb") as f:
+                context = _json_loads(f.read()).get("currentContext") or ""
+        except (OSError, ValueError, AttributeError):
+            pass
+    if not context or context == "default":
+        return f"unix://{_DEFAULT_SOCKET}"
+    # Context metadata lives in a directory named by the sha256 of its name
+    meta_path = os.path.join(
+        config_dir, "contexts", "meta",
+        hashlib.sha256(context.encode()).hexdigest(), "meta.json",
+    )
+    try:
+        with open(meta_path, "rb") as f:
+            host = _json_loads(f.read())["Endpoints"]["docker"]["Host"]
+    except (OSError, ValueError, KeyError, TypeError):
+        host = None
+    # Unresolvable contexts still get a distinct name for the report cache
+    return host or f"context:{context}"
+
+
+def _docker_socket() -> str | None:
+    host = _docker_host()
+    if host.startswith("unix://"):
+        return host[len("unix://"):]
+    # tcp:// or ssh:// daemons, and contexts we can't resolve, are left to the CLI
+    return None
+
+
+def _parse_api_version(version: str) -> tuple[int, int]:
+    major, _, minor = version.partition(".")
+    return int(major), int(minor)
+
+
+def _engine_get(path: str) -> Any | None:
+    """GET a Docker Engine API endpoint and return the decoded JSON body."""
+    socket_path = _docker_socket()
+    if socket_path is None or not os.path.exists(socket_path):
+        return None
+    conn = _UnixHTTPConnection(socket_path, timeout=30)
+    try:
+        # Negotiate like the CLI: the daemon's version, capped at ours
+        conn.request("GET", "/version")
+        resp = conn.getresponse()
+        body = resp.read()
+        if resp.status != 200:
+            return None
+        info = _json_loads(body)
+        version = min(_parse_api_version(info["ApiVersion"]), _ENGINE_API_MAX)
+        if version < _parse_api_version(info.get("MinAPIVersion", "0.0")):
+            return None
+
+        conn.request("GET", f"/v{version[0]}.{version[1]}{path}")
+        resp = conn.getresponse()
+        body = resp.read()
+        if resp.status != 200:
+            return None
+        return _json_loads(body)
+    except (OSError, http.client.HTTPException, ValueError, KeyError, TypeError):
+        return None
+    finally:
+        conn.close()
+
+
+def _human_since(timestamp: int) -> str:
+    """Format a unix timestamp like the Docker CLI's 'CreatedSince' column."""
+    seconds = int(time.time() - timestamp)
+    minutes = seconds // 60
+    hours = int(seconds / 3600 + 0.5)
+    if seconds < 1:
+        since = "Less than a second"
+    elif seconds == 1:
+        since = "1 second"
+    elif seconds < 60:
+        since = f"{seconds} seconds"
+    elif minutes == 1:
+        since = "About a minute"
+    elif minutes < 60:
+        since = f"{minutes} minutes"
+    elif hours == 1:
+        since = "About an hour"
+    elif hours < 48:
+        since = f"{hours} hours"
+    elif hours < 24 * 7 * 2:
+        since = f"{hours // 24} days"
+    elif hours < 24 * 30 * 2:
+        since = f"{hours // 24 // 7} weeks"
+    elif hours < 24 * 365 * 2:
+        since = f"{hours // 24 // 30} months"
+    else:
+        since = f"{seconds // 3600 // 24 // 365} years"
+    return f"{since} ago"
 
 
-def _run_docker(*args: str) -> str | None:
+def _run_docker(*args: str) -> bytes | None:
     try:
         result = subprocess.run(
             ["docker", *args],
             capture_output=True,
-            text=True,
             timeout=30,
         )
         if result.returncode != 0:
@@ -48,58 +218,229 @@ def _run_docker(*args: str) -> str | None:
         return None
 
 
-def scan_docker() -> DockerReport | None:
-    """Run a full Docker disk usage analysis."""
-    raw = _run_docker("system", "df", "-v", "--format", "{{json .}}")
-    if raw is None:
-        return None
+class _BuildCacheRow(NamedTuple):
+    """A build cache record; these are only aggregated, never shown per row."""
 
-    try:
-        data = json.loads(raw)
-    except json.JSONDecodeError:
-        return None
+    cache_type: str
+    size_bytes: int
+    in_use: bool
 
-    # Images
+
+_DockerDf = tuple[
+    list[DockerImage], list[DockerContainer], list[DockerVolume], list[_BuildCacheRow]
+]
+
+
+def _parse_engine_df(data: dict) -> _DockerDf:
+    """Convert an Engine API /system/df response; sizes are already integers."""
     images: list[DockerImage] = []
     for img in data.get("Images") or []:
+        repo_tags = img.get("RepoTags") or ["<none>:<none>"]
+        repo, _, tag = repo_tags[0].rpartition(":")
+        size = img.get("Size", 0)
+        shared = img.get("SharedSize", -1)
         images.append(DockerImage(
-            repo=img.get("Repository", "<none>"),
-            tag=img.get("Tag", "<none>"),
-            image_id=img.get("ID", "")[:19],
-            size_bytes=_parse_size(img.get("Size", "0B")),
-            unique_bytes=_parse_size(img.get("UniqueSize", "0B")),
-            shared_bytes=_parse_size(img.get("SharedSize", "0B")),
-            created=img.get("CreatedSince", ""),
-            containers=int(img.get("Containers", 0)),
+            repo=repo or "<none>",
+            tag=tag or "<none>",
+            image_id=img.get("Id", "")[:19],
+            size_bytes=size,
+            unique_bytes=size - shared if shared >= 0 else size,
+            shared_bytes=max(shared, 0),
+            created=_human_since(img.get("Created", 0)),
+            containers=max(img.get("Containers", 0), 0),
         ))
-    images.sort(key=lambda i: i.size_bytes, reverse=True)
 
-    # Containers
     containers: list[DockerContainer] = []
     for ctr in data.get("Containers") or []:
-        size_str = ctr.get("Size", "0B")
-        # Container size format: "1.2MB (virtual 3.4GB)" — take first part
-        size_part = size_str.split("(")[0].strip()
+        names = ctr.get("Names") or []
         containers.append(DockerContainer(
-            name=ctr.get("Names", ""),
+            name=",".join(n.lstrip("/") for n in names),
             image=ctr.get("Image", ""),
-            container_id=ctr.get("ID", "")[:12],
-            size_bytes=_parse_size(size_part),
+            container_id=ctr.get("Id", "")[:12],
+            size_bytes=ctr.get("SizeRw", 0) or 0,
             state=ctr.get("State", ""),
             status=ctr.get("Status", ""),
-            created=ctr.get("RunningFor", ""),
+            created=_human_since(ctr.get("Created", 0)),
         ))
-    containers.sort(key=lambda c: c.size_bytes, reverse=True)
 
-    # Volumes
     volumes: list[DockerVolume] = []
     for vol in data.get("Volumes") or []:
+        usage = vol.get("UsageData") or {}
         volumes.append(DockerVolume(
             name=vol.get("Name", ""),
-            size_bytes=_parse_size(vol.get("Size", "0B")),
+            size_bytes=max(usage.get("Size", 0), 0),
             driver=vol.get("Driver", ""),
             mountpoint=vol.get("Mountpoint", ""),
         ))
+
+    build_cache = [
+        _BuildCacheRow(bc.get("Type", "unknown"), bc.get("Size", 0), bool(bc.get("InUse", False)))
+        for bc in data.get("BuildCache") or []
+    ]
+
+    return images, containers, volumes, build_cache
+
+
+# `docker system df -v` fields in constructor order. Rows normally carry every
+# key, so one itemgetter call pulls them all; the defaults are only merged in
+# for a row that is missing one
+_CLI_IMAGE_DEFAULTS = {
+    "Repository": "<none>", "Tag": "<none>", "ID": "", "Size": "0B",
+    "UniqueSize": "0B", "SharedSize": "0B", "CreatedSince": "", "Containers": 0,
+}
+_CLI_CONTAINER_DEFAULTS = {
+    "Names": "", "Image": "", "ID": "", "Size": "0B",
+    "State": "", "Status": "", "RunningFor": "",
+}
+_CLI_VOLUME_DEFAULTS = {"Name": "", "Size": "0B", "Driver": "", "Mountpoint": ""}
+_CLI_BUILD_CACHE_DEFAULTS = {"CacheType": "unknown", "Size": "0B", "InUse": False}
+_cli_image_fields = itemgetter(*_CLI_IMAGE_DEFAULTS)
+_cli_container_fields = itemgetter(*_CLI_CONTAINER_DEFAULTS)
+_cli_volume_fields = itemgetter(*_CLI_VOLUME_DEFAULTS)
+_cli_build_cache_fields = itemgetter(*_CLI_BUILD_CACHE_DEFAULTS)
+
+
+def _parse_cli_df(data: dict) -> _DockerDf:
+    """Convert `docker system df -v` JSON output, whose sizes are human strings."""
+    images: list[DockerImage] = []
+    for img in data.get("Images") or []:
+        try:
+            fields = _cli_image_fields(img)
+        except KeyError:
+            fields = _cli_image_fields(_CLI_IMAGE_DEFAULTS | img)
+        repo, tag, id_, size, unique, shared, created, ctrs = fields
+        images.append(DockerImage(
+            repo=repo,
+            tag=tag,
+            image_id=id_[:19],
+            size_bytes=_parse_size(size),
+            unique_bytes=_parse_size(unique),
+            shared_bytes=_parse_size(shared),
+            created=created,
+            containers=int(ctrs),
+        ))
+
+    containers: list[DockerContainer] = []
+    for ctr in data.get("Containers") or []:
+        try:
+            fields = _cli_container_fields(ctr)
+        except KeyError:
+            fields = _cli_container_fields(_CLI_CONTAINER_DEFAULTS | ctr)
+        names, image, id_, size, state, status, created = fields
+        # Container size format: "1.2MB (virtual 3.4GB)" — take first part
+        size_part = size.split("(")[0].strip()
+        containers.append(DockerContainer(
+            name=names,
+            image=image,
+            container_id=id_[:12],
+            size_bytes=_parse_size(size_part),
+            state=state,
+            status=status,
+            created=created,
+        ))
+
+    volumes: list[DockerVolume] = []
+    for vol in data.get("Volumes") or []:
+        try:
+            fields = _cli_volume_fields(vol)
+        except KeyError:
+            fields = _cli_volume_fields(_CLI_VOLUME_DEFAULTS | vol)
+        name, size, driver, mountpoint = fields
+        volumes.append(DockerVolume(
+            name=name,
+            size_bytes=_parse_size(size),
+            driver=driver,
+            mountpoint=mountpoint,
+        ))
+
+    build_cache: list[_BuildCacheRow] = []
+    for bc in data.get("BuildCache") or []:
+        try:
+            fields = _cli_build_cache_fields(bc)
+        except KeyError:
+            fields = _cli_build_cache_fields(_CLI_BUILD_CACHE_DEFAULTS | bc)
+        cache_type, size, in_use = fields
+        build_cache.append(_BuildCacheRow(cache_type, _parse_size(size), bool(in_use)))
+
+    return images, containers, volumes, build_cache
+
+
+def _fetch_df() -> _DockerDf | None:
+    """Read disk usage from the Engine API, falling back to the docker CLI."""
+    data = _engine_get("/system/df")
+    if isinstance(data, dict):
+        return _parse_engine_df(data)
+
+    raw = _run_docker("system", "df", "-v", "--format", "{{json .}}")
+    if raw is None:
+        return None
+    try:
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError
+        data = _json_loads(raw)
+    except json.JSONDecodeError:
+        return None
+    return _parse_cli_df(data)
+
+
+def _load_cached_report(host: str) -> DockerReport | None:
+    """Return the cached report if it is from `host` and younger than _CACHE_TTL."""
+    try:
+        if time.time() - os.stat(_CACHE_PATH).st_mtime >= _CACHE_TTL:
+            return None
+        with open(_CACHE_PATH, "rb") as f:
+            cached = _json_loads(f.read())
+        if cached["host"] != host:
+            return None
+        data = cached["report"]
+        return DockerReport(
+            overview=DockerOverview(**data["overview"]),
+            images=[DockerImage(**i) for i in data["images"]],
+            containers=[DockerContainer(**c) for c in data["containers"]],
+            volumes=[DockerVolume(**v) for v in data["volumes"]],
+            build_cache_by_type=data["build_cache_by_type"],
+        )
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _save_cached_report(host: str, report: DockerReport) -> None:
+    try:
+        DUSK_DIR.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=DUSK_DIR, prefix="docker-cache.", suffix=".tmp")
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_json_dumps({"host": host, "report": asdict(report)}))
+        os.replace(tmp_path, _CACHE_PATH)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+
+def scan_docker(refresh: bool = False) -> DockerReport | None:
+    """Run a full Docker disk usage analysis, reusing a fresh cached report."""
+    host = _docker_host()
+    if not refresh:
+        cached = _load_cached_report(host)
+        if cached is not None:
+            return cached
+    report = _scan_docker()
+    if report is not None:
+        _save_cached_report(host, report)
+    return report
+
+
+def _scan_docker() -> DockerReport | None:
+    df = _fetch_df()
+    if df is None:
+        return None
+    images, containers, volumes, build_cache = df
+
+    images.sort(key=lambda i: i.size_bytes, reverse=True)
+    containers.sort(key=lambda c: c.size_bytes, reverse=True)
     volumes.sort(key=lambda v: v.size_bytes, reverse=True)
 
     # Build cache — aggregate by type
@@ -107,23 +448,30 @@ def scan_docker() -> DockerReport | None:
     bc_total_size = 0
     bc_reclaimable = 0
     bc_count = 0
-    for bc in data.get("BuildCache") or []:
-        size = _parse_size(bc.get("Size", "0B"))
-        cache_type = bc.get("CacheType", "unknown")
+    for cache_type, size, in_use in build_cache:
         build_cache_by_type[cache_type] = build_cache_by_type.get(cache_type, 0) + size
         bc_total_size += size
         bc_count += 1
-        if not bc.get("InUse", False):
+        if not in_use:
             bc_reclaimable += size
 
-    # Build overview
-    total_images_size = sum(i.size_bytes for i in images)
-    unique_images_size = sum(i.unique_bytes for i in images)
-    active_images = sum(1 for i in images if i.containers > 0)
-    reclaimable_images = sum(i.size_bytes for i in images if i.containers == 0)
+    # Build overview — one pass per collection
+    total_images_size = 0
+    active_images = 0
+    reclaimable_images = 0
+    for i in images:
+        total_images_size += i.size_bytes
+        if i.containers > 0:
+            active_images += 1
+        elif i.containers == 0:
+            reclaimable_images += i.size_bytes
 
-    active_containers = sum(1 for c in containers if c.state == "running")
-    total_containers_size = sum(c.size_bytes for c in containers)
+    total_containers_size = 0
+    active_containers = 0
+    for c in containers:
+        total_containers_size += c.size_bytes
+        if c.state == "running":
+            active_containers += 1
 
     active_volumes = 0  # approximate: volumes with non-zero links
     total_volumes_size = sum(v.size_bytes for v in volumes)
@@ -1,16 +1,22 @@
 from __future__ import annotations
 
 import os
+import re
 import shutil
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 
 import click
 from rich.console import Console
 
 from . import db, display, docker, scanner
+from .models import ScanComparison, ScanResult
 
 console = Console()
 
+# Queries mentioning these pull in Docker data unless --docker/--no-docker is given
+DOCKER_QUERY_RE = re.compile(r"docker|container|image|volume", re.IGNORECASE)
+
 EXAMPLES = """
 [bold]Examples:[/bold]
 
@@ -21,7 +27,8 @@ EXAMPLES = """
   dusk show 3            Show report for scan #3
   dusk compare           Diff last two scans
   dusk docker            Show Docker disk usage
-  dusk ask "what can I delete?"          Ask Claude (auto-includes Docker data)
+  dusk ask "what can I delete?"          Ask Claude
+  dusk ask --docker "what can I delete?" Include Docker disk usage
   dusk ask --codex "cleanup suggestions" Ask Codex instead
   dusk ask --scan-id 3 "why so big?"     Ask about a specific scan
   dusk prune             Clean old scan data
@@ -69,15 +76,24 @@ def scan_cmd(
             min_file_size_mb=min_size,
         )
 
-    comparison = None
-    if not no_history:
-        db.save_scan(result)
-        if not no_trend:
-            previous = db.get_previous_scan(expanded)
-            if previous:
-                comparison = db.compare_scans(result, previous)
+    if no_history:
+        display.show_full_scan(result)
+        return
+
+    # Save and diff against history while the report renders
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        comparison = pool.submit(_save_and_compare, result, expanded, not no_trend)
+        display.show_full_scan(result, comparison)
 
-    display.show_full_scan(result, comparison)
+
+def _save_and_compare(
+    result: ScanResult, root_path: str, with_trend: bool
+) -> ScanComparison | None:
+    db.save_scan(result)
+    if not with_trend:
+        return None
+    previous = db.get_previous_scan(root_path)
+    return db.compare_scans(result, previous) if previous else None
 
 
 @main.command("history")
@@ -152,7 +168,7 @@ def docker_cmd() -> None:
         raise SystemExit(1)
 
     with console.status("[bold blue]Scanning Docker...[/bold blue]"):
-        report = docker.scan_docker()
+        report = docker.scan_docker(refresh=True)
 
     if report is None:
         console.print(
@@ -168,7 +184,13 @@ def docker_cmd() -> None:
 @click.argument("query")
 @click.option("--scan-id", type=int, default=None, help="Use a specific scan by ID.")
 @click.option("--codex", is_flag=True, help="Use Codex instead of Claude.")
-def ask_cmd(query: str, scan_id: int | None, codex: bool) -> None:
+@click.option(
+    "--docker/--no-docker",
+    "docker_flag",
+    default=None,
+    help="Include Docker disk usage (default: only if the question mentions Docker).",
+)
+def ask_cmd(query: str, scan_id: int | None, codex: bool, docker_flag: bool | None) -> None:
     """Ask Claude or Codex a question about your disk usage."""
     tool = "codex" if codex else "claude"
     bin_path = shutil.which(tool)
@@ -176,6 +198,10 @@ def ask_cmd(query: str, scan_id: int | None, codex: bool) -> None:
         console.print(f"[red]Error:[/red] {tool} CLI not found. Install it first.")
         raise SystemExit(1)
 
+    # `docker system df -v` walks every image, container and volume, so
+    # only run it when the question is about Docker or it was asked for
+    want_docker = docker_flag if docker_flag is not None else bool(DOCKER_QUERY_RE.search(query))
+
     # Load the scan
     if scan_id:
         result = db.get_scan_by_id(scan_id)
@@ -190,34 +216,41 @@ def ask_cmd(query: str, scan_id: int | None, codex: bool) -> None:
             raise SystemExit(1)
         result = scans[0]
 
-    scan_text = display.format_scan_text(result)
-    prompt = (
-        "You are a disk usage advisor. Answer ONLY based on the disk usage report "
-        "provided below. Do NOT suggest running shell commands and do NOT ask for "
-        "permission to execute commands. If the report lacks detail about a specific "
-        "directory, recommend the user run a deeper scan, e.g. "
-        "`dusk scan <path> -d2` or `dusk scan <path> -d3`.\n\n"
-        f"{scan_text}"
-    )
+    # Format the scan report while Docker is being scanned
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        docker_future = (
+            pool.submit(docker.scan_docker)
+            if want_docker and docker.is_docker_available()
+            else None
+        )
+        scan_text = display.format_scan_text(result)
+        prompt = (
+            "You are a disk usage advisor. Answer ONLY based on the disk usage report "
+            "provided below. Do NOT suggest running shell commands and do NOT ask for "
+            "permission to execute commands. If the report lacks detail about a specific "
+            "directory, recommend the user run a deeper scan, e.g. "
+            "`dusk scan <path> -d2` or `dusk scan <path> -d3`.\n\n"
+            f"{scan_text}"
+        )
+        docker_report = docker_future.result() if docker_future else None
 
-    # Auto-include Docker data when available
-    if docker.is_docker_available():
-        docker_report = docker.scan_docker()
-        if docker_report:
-            prompt += f"\n\n{display.format_docker_text(docker_report)}"
+    if docker_report:
+        prompt += f"\n\n{display.format_docker_text(docker_report)}"
 
     prompt += f"\n\nQuestion: {query}"
 
     console.print(f"[dim]Using scan #{result.scan_id} ({result.timestamp.strftime('%Y-%m-%d %H:%M')})[/dim]")
     console.print(f"[dim]Asking {tool}...[/dim]\n")
 
+    # The prompt goes over stdin: it can be tens of KB with Docker data,
+    # which argv would copy at exec time and cap at ARG_MAX
     if codex:
-        cmd = [bin_path, "-p", prompt]
+        cmd = [bin_path, "exec", "-"]
     else:
         cmd = [
             bin_path,
             "--allowedTools", "WebSearch", "WebFetch",
             "--tools", "WebSearch,WebFetch",
-            "-p", prompt,
+            "-p",
         ]
-    subprocess.run(cmd)
+    subprocess.run(cmd, input=prompt.encode())
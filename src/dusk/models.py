@@ -4,7 +4,7 @@ from dataclasses import dataclass, field
 from datetime import datetime
 
 
-@dataclass
+@dataclass(slots=True)
 class DiskInfo:
     total_bytes: int
     used_bytes: int
@@ -15,20 +15,20 @@ class DiskInfo:
     apfs_container: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class DirEntry:
     path: str
     size_bytes: int
     file_count: int | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class FileEntry:
     path: str
     size_bytes: int
 
 
-@dataclass
+@dataclass(slots=True)
 class ScanResult:
     scan_id: int | None
     timestamp: datetime
@@ -39,7 +39,7 @@ class ScanResult:
     total_scanned_bytes: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class TrendEntry:
     path: str
     current_bytes: int
@@ -48,7 +48,7 @@ class TrendEntry:
     delta_percent: float
 
 
-@dataclass
+@dataclass(slots=True)
 class ScanComparison:
     current: ScanResult
     previous: ScanResult
@@ -61,7 +61,7 @@ class ScanComparison:
 # --- Docker models ---
 
 
-@dataclass
+@dataclass(slots=True)
 class DockerImage:
     repo: str
     tag: str
@@ -73,7 +73,7 @@ class DockerImage:
     containers: int
 
 
-@dataclass
+@dataclass(slots=True)
 class DockerContainer:
     name: str
     image: str
@@ -84,7 +84,7 @@ class DockerContainer:
     created: str
 
 
-@dataclass
+@dataclass(slots=True)
 class DockerVolume:
     name: str
     size_bytes: int
@@ -92,7 +92,7 @@ class DockerVolume:
     mountpoint: str
 
 
-@dataclass
+@dataclass(slots=True)
 class DockerBuildCache:
     cache_type: str
     size_bytes: int
@@ -100,7 +100,7 @@ class DockerBuildCache:
     description: str
 
 
-@dataclass
+@dataclass(slots=True)
 class DockerOverview:
     images_total: int
     images_active: int
@@ -118,7 +118,7 @@ class DockerOverview:
     build_cache_reclaimable: int
 
 
-@dataclass
+@dataclass(slots=True)
 class DockerReport:
     overview: DockerOverview
     images: list[DockerImage] = field(default_factory=list)
@@ -0,0 +1,6 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+# Per-user home for the scan database and caches
+DUSK_DIR = Path.home() / ".dusk"
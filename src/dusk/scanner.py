@@ -1,13 +1,29 @@
 from __future__ import annotations
 
+import ctypes
+import functools
+import heapq
 import os
 import plistlib
+import re
+import stat
 import subprocess
+import sys
+import time
 from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from operator import attrgetter, itemgetter
 
 from .models import DirEntry, DiskInfo, FileEntry, ScanResult
 
+_WALK_WORKERS = 8
+# Absolute paths: CPython only spawns via posix_spawn (instead of fork+exec)
+# when the executable has a directory part and close_fds=False
+_DISKUTIL = "/usr/sbin/diskutil"
+_MDFIND = "/usr/bin/mdfind"
+_FIND = "/usr/bin/find"
+_WALK_TIMEOUT = 300  # seconds
+
 
 def _get_mount_point(path: str) -> str:
     """Resolve a path to its filesystem mount point."""
@@ -17,8 +33,93 @@ def _get_mount_point(path: str) -> str:
     return path
 
 
+class _Statfs(ctypes.Structure):
+    """struct statfs from <sys/mount.h> with 64-bit inodes (macOS)."""
+
+    _fields_ = [
+        ("f_bsize", ctypes.c_uint32),
+        ("f_iosize", ctypes.c_int32),
+        ("f_blocks", ctypes.c_uint64),
+        ("f_bfree", ctypes.c_uint64),
+        ("f_bavail", ctypes.c_uint64),
+        ("f_files", ctypes.c_uint64),
+        ("f_ffree", ctypes.c_uint64),
+        ("f_fsid", ctypes.c_int32 * 2),
+        ("f_owner", ctypes.c_uint32),
+        ("f_type", ctypes.c_uint32),
+        ("f_flags", ctypes.c_uint32),
+        ("f_fssubtype", ctypes.c_uint32),
+        ("f_fstypename", ctypes.c_char * 16),
+        ("f_mntonname", ctypes.c_char * 1024),
+        ("f_mntfromname", ctypes.c_char * 1024),
+        ("f_flags_ext", ctypes.c_uint32),
+        ("f_reserved", ctypes.c_uint32 * 7),
+    ]
+
+
+# APFS volumes are slices of their container: /dev/disk3s1s1 -> disk3; snapshot
+# mounts prefix the device, as in com.apple.os.update-...@/dev/disk3s1
+_APFS_DEVICE_RE = re.compile(r"/dev/(disk\d+)s\d+")
+
+
+@functools.cache
+def _libc_statfs():
+    libc = ctypes.CDLL("/usr/lib/libc.dylib", use_errno=True)
+    try:
+        # Intel builds keep the 32-bit-inode layout under the plain name
+        fn = getattr(libc, "statfs$INODE64")
+    except AttributeError:
+        fn = libc.statfs
+    fn.argtypes = [ctypes.c_char_p, ctypes.POINTER(_Statfs)]
+    fn.restype = ctypes.c_int
+    return fn
+
+
+def _statfs(path: str) -> _Statfs | None:
+    """Call statfs(2) directly; returns None off macOS or on failure."""
+    if sys.platform != "darwin":
+        return None
+    try:
+        buf = _Statfs()
+        if _libc_statfs()(os.fsencode(path), ctypes.byref(buf)) != 0:
+            return None
+    except OSError:
+        return None
+    return buf
+
+
+def _volume_name(mount: str) -> str:
+    """Name a volume from /Volumes, where the boot volume is a symlink to /."""
+    if os.path.dirname(mount) == "/Volumes":
+        return os.path.basename(mount)
+    try:
+        with os.scandir("/Volumes") as it:
+            for entry in it:
+                if entry.is_symlink() and os.path.realpath(entry.path) == mount:
+                    return entry.name
+    except OSError:
+        pass
+    return ""
+
+
+def _diskutil_info(mount: str) -> dict:
+    try:
+        result = subprocess.run(
+            [_DISKUTIL, "info", "-plist", mount],
+            capture_output=True,
+            timeout=10,
+            stdin=subprocess.DEVNULL,
+            close_fds=False,
+        )
+        if result.returncode == 0:
+            return plistlib.loads(result.stdout)
+    except (subprocess.TimeoutExpired, Exception):
+        pass
+    return {}
+
+
 def get_disk_info(path: str = "/") -> DiskInfo:
-    """Get disk info via os.statvfs + diskutil."""
+    """Get disk info via os.statvfs + statfs(2), with diskutil as a fallback."""
     mount = _get_mount_point(path)
     st = os.statvfs(mount)
     total = st.f_frsize * st.f_blocks
@@ -30,19 +131,22 @@ def get_disk_info(path: str = "/") -> DiskInfo:
     fs_type = ""
     apfs_container = ""
 
-    try:
-        result = subprocess.run(
-            ["diskutil", "info", "-plist", mount],
-            capture_output=True,
-            timeout=10,
-        )
-        if result.returncode == 0:
-            plist = plistlib.loads(result.stdout)
-            volume_name = plist.get("VolumeName", "")
-            fs_type = plist.get("FilesystemType", "")
-            apfs_container = plist.get("APFSContainerReference", "")
-    except (subprocess.TimeoutExpired, Exception):
-        pass
+    sfs = _statfs(mount)
+    if sfs is not None:
+        fs_type = sfs.f_fstypename.decode()
+        mount = os.fsdecode(sfs.f_mntonname)
+        if fs_type == "apfs":
+            m = _APFS_DEVICE_RE.search(os.fsdecode(sfs.f_mntfromname))
+            if m:
+                apfs_container = m.group(1)
+        volume_name = _volume_name(mount)
+
+    # diskutil is slow to start, so only ask it for what statfs couldn't give
+    if not volume_name:
+        plist = _diskutil_info(mount)
+        volume_name = plist.get("VolumeName", "")
+        fs_type = fs_type or plist.get("FilesystemType", "")
+        apfs_container = apfs_container or plist.get("APFSContainerReference", "")
 
     return DiskInfo(
         total_bytes=total,
@@ -58,41 +162,93 @@ def get_disk_info(path: str = "/") -> DiskInfo:
 def scan_directories(
     root: str, depth: int = 1, top_n: int = 20
 ) -> list[DirEntry]:
-    """Scan directory sizes using du -x (stay on same filesystem)."""
+    """Measure directory sizes like du -x: allocated blocks, same filesystem only."""
+    if depth < 1:
+        return []
     try:
-        proc = subprocess.Popen(
-            ["du", "-x", f"-d{depth}", "-k", root],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.DEVNULL,
-            text=True,
-        )
-        stdout, _ = proc.communicate(timeout=300)
-    except subprocess.TimeoutExpired:
-        # Capture whatever partial output we have
-        assert proc.stdout is not None
-        stdout = proc.stdout.read()
-        proc.kill()
-        proc.wait()
-    except Exception:
+        root_dev = os.stat(root).st_dev
+        with os.scandir(root) as it:
+            children = [e for e in it if e.is_dir(follow_symlinks=False)]
+    except OSError:
         return []
 
-    entries: list[DirEntry] = []
-    for line in stdout.strip().splitlines():
-        parts = line.split("\t", 1)
-        if len(parts) != 2:
-            continue
+    # Loop invariants of the per-entry walk, bound once instead of looked up
+    # on every directory entry
+    monotonic = time.monotonic
+    scandir = os.scandir
+    is_dir_mode = stat.S_ISDIR
+    deadline = monotonic() + _WALK_TIMEOUT
+
+    # Hard links: (dev, ino) -> (bytes, dir of the first link seen)
+    Links = dict[tuple[int, int], tuple[int, str]]
+
+    def dir_usage(
+        entry: os.DirEntry, level: int, out: list[tuple[int, str]], links: Links
+    ) -> int:
+        """Return the bytes used by `entry` and everything below it."""
+        total = entry.stat(follow_symlinks=False).st_blocks * 512
+        # Past the deadline, stop descending and keep what was measured
+        if monotonic() < deadline:
+            try:
+                with scandir(entry.path) as it:
+                    for child in it:
+                        try:
+                            st = child.stat(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        if st.st_dev != root_dev:
+                            continue
+                        if is_dir_mode(st.st_mode):
+                            total += dir_usage(child, level + 1, out, links)
+                        elif st.st_nlink == 1:
+                            total += st.st_blocks * 512
+                        elif (st.st_dev, st.st_ino) not in links:
+                            # Only counted the first time, like du
+                            links[st.st_dev, st.st_ino] = (st.st_blocks * 512, entry.path)
+                            total += st.st_blocks * 512
+            except OSError:
+                pass
+        if level <= depth:
+            out.append((total, entry.path))
+        return total
+
+    def measure(entry: os.DirEntry) -> tuple[list[tuple[int, str]], Links]:
+        out: list[tuple[int, str]] = []
+        links: Links = {}
         try:
-            size_kb = int(parts[0])
-        except ValueError:
-            continue
-        path = parts[1]
-        # Skip the root itself — we want children only
-        if os.path.normpath(path) == os.path.normpath(root):
-            continue
-        entries.append(DirEntry(path=path, size_bytes=size_kb * 1024))
+            if entry.stat(follow_symlinks=False).st_dev == root_dev:
+                dir_usage(entry, 1, out, links)
+        except OSError:
+            pass
+        return out, links
+
+    # stat() releases the GIL, so top-level subtrees are walked in parallel
+    children.sort(key=attrgetter("name"))
+    with ThreadPoolExecutor(max_workers=_WALK_WORKERS) as pool:
+        measured = list(pool.map(measure, children))
 
-    entries.sort(key=lambda e: e.size_bytes, reverse=True)
-    return entries[:top_n]
+    # Each walker dedups hard links only within its own subtree. A file linked
+    # from several subtrees belongs to the first by name, so the result does
+    # not depend on which thread got there first; later subtrees give it back
+    # along the path from the link up to their top.
+    seen: set[tuple[int, int]] = set()
+    rows: list[tuple[int, str]] = []
+    for child, (out, links) in zip(children, measured):
+        sizes = {path: size for size, path in out}
+        for key, (size, path) in links.items():
+            if key not in seen:
+                seen.add(key)
+                continue
+            while True:
+                if path in sizes:
+                    sizes[path] -= size
+                if path == child.path:
+                    break
+                path = os.path.dirname(path)
+        rows.extend((size, path) for path, size in sizes.items())
+
+    top = heapq.nlargest(top_n, rows, key=itemgetter(0))
+    return [DirEntry(path=path, size_bytes=size) for size, path in top]
 
 
 def find_large_files(
@@ -104,8 +260,7 @@ def find_large_files(
     if files is None:
         files = _find_large_files_find(root, min_size_mb)
 
-    files.sort(key=lambda f: f.size_bytes, reverse=True)
-    return files[:top_n]
+    return heapq.nlargest(top_n, files, key=attrgetter("size_bytes"))
 
 
 def _find_large_files_mdfind(
@@ -115,29 +270,46 @@ def _find_large_files_mdfind(
     try:
         result = subprocess.run(
             [
-                "mdfind",
+                _MDFIND,
                 "-onlyin",
                 root,
+                "-attr",
+                "kMDItemFSSize",
                 f"kMDItemFSSize >= {min_bytes}",
             ],
             capture_output=True,
             text=True,
             timeout=30,
+            stdin=subprocess.DEVNULL,
+            close_fds=False,
         )
         if result.returncode != 0:
             return None
     except (subprocess.TimeoutExpired, Exception):
         return None
 
+    # Lines look like "<path>   kMDItemFSSize = 12345"; stat only when the
+    # attribute is missing or unparseable
     files: list[FileEntry] = []
-    for path in result.stdout.strip().splitlines():
+    for line in result.stdout.strip().splitlines():
+        path, sep, size_str = line.rpartition(" kMDItemFSSize = ")
+        size: int | None = None
+        if sep:
+            path = path.rstrip()
+            try:
+                size = int(size_str)
+            except ValueError:
+                pass
+        else:
+            path = line
         if not path:
             continue
-        try:
-            size = os.path.getsize(path)
-            files.append(FileEntry(path=path, size_bytes=size))
-        except OSError:
-            continue
+        if size is None:
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                continue
+        files.append(FileEntry(path=path, size_bytes=size))
     return files
 
 
@@ -146,7 +318,7 @@ def _find_large_files_find(root: str, min_size_mb: int) -> list[FileEntry]:
     try:
         result = subprocess.run(
             [
-                "find",
+                _FIND,
                 root,
                 "-xdev",
                 "-type",
@@ -157,6 +329,8 @@ def _find_large_files_find(root: str, min_size_mb: int) -> list[FileEntry]:
             capture_output=True,
             text=True,
             timeout=60,
+            stdin=subprocess.DEVNULL,
+            close_fds=False,
         )
     except subprocess.TimeoutExpired:
         return []